@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import json
+import mmap
+import os
 import re
 import sys
-from dataclasses import dataclass
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable, List, Set, Tuple
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Set, Tuple
 
 
-@dataclass(frozen=True)
-class MissingKey:
+class MissingKey(NamedTuple):
     file: Path
     line: int
     key: str
@@ -17,44 +20,94 @@ class MissingKey:
 
 
 # Keys are expected to look like: segment.segment or segment_segment etc.
-KEY_TOKEN_RE = re.compile(r"^[a-z0-9]+([._-][a-z0-9]+)+$", re.IGNORECASE)
+KEY_TOKEN_RE = re.compile(r"^[A-Za-z0-9]+([._-][A-Za-z0-9]+)+$")
 
 # Extraction from Core/Services/LocalizationService.cs (hardcoded en-US dictionary)
-EN_DICT_KEY_RE = re.compile(r"\[\s*\"(?P<key>[^\"]+)\"\s*\]\s*=\s*")
+EN_DICT_KEY_RE = re.compile(rb"\[\s*\"(?P<key>[^\"]+)\"\s*\]\s*=\s*")
 
-# C# usage patterns
-GETSTRING_RE = re.compile(r"\.GetString\(\s*\"(?P<key>[^\"]+)\"\s*(?:,|\))")
-L_INDEXER_RE = re.compile(r"\bL\s*\[\s*\"(?P<key>[^\"]+)\"\s*\]")
-STRINGS_INDEXER_RE = re.compile(r"\bStrings\s*\[\s*\"(?P<key>[^\"]+)\"\s*\]")
-LOCALIZATION_INDEXER_RE = re.compile(r"\bLocalization\s*\[\s*\"(?P<key>[^\"]+)\"\s*\]")
+# Shell files are scanned as memory-mapped bytes; only matched keys and reported lines are decoded.
 
-# XAML binding patterns: {Binding L[foo.bar]} / {Binding Localization[foo.bar]}
-XAML_L_INDEXER_RE = re.compile(r"\bL\[(?P<key>[A-Za-z0-9._-]+)\]")
-XAML_LOCALIZATION_INDEXER_RE = re.compile(r"\bLocalization\[(?P<key>[A-Za-z0-9._-]+)\]")
+# Cheap pre-check: every usage pattern below needs one of these tokens, so files
+# without any of them are skipped before the full scan.
+KEY_HINT_RE = re.compile(rb"GetString\(|\b(?:L|Strings|Localization)\s*\[|\bLocalize\b")
+
+# Usage patterns are matched against whole files, so none of them may span a line break
+# ([^\S\n] is whitespace other than a newline).
 
+# C# usage patterns: .GetString("foo.bar") / L["foo.bar"] / Strings["foo.bar"] / Localization["foo.bar"]
+CS_KEY_RE = re.compile(
+    rb"\.GetString\([^\S\n]*\"(?P<getstring>[^\"\n]+)\"[^\S\n]*(?:,|\))"
+    rb"|\bL[^\S\n]*\[[^\S\n]*\"(?P<l_indexer>[^\"\n]+)\"[^\S\n]*\]"
+    rb"|\bStrings[^\S\n]*\[[^\S\n]*\"(?P<strings_indexer>[^\"\n]+)\"[^\S\n]*\]"
+    rb"|\bLocalization[^\S\n]*\[[^\S\n]*\"(?P<localization_indexer>[^\"\n]+)\"[^\S\n]*\]"
+)
+
+# XAML binding patterns: {Binding L[foo.bar]} / {Binding Localization[foo.bar]}
 # MarkupExtension usage (Avalonia): {converters:Localize dialog.connect.title} or {converters:Localize Key=dialog.connect.title}
-XAML_LOCALIZE_POS_RE = re.compile(r"\bLocalize\s+(?P<key>[A-Za-z0-9._-]+)")
-XAML_LOCALIZE_KV_RE = re.compile(r"\bLocalize\b[^\}]*\bKey\s*=\s*(?P<quote>\"|')(?P<key>[^\"']+)(?P=quote)")
+# The Key= form is listed before the positional form so "Localize Key=..." is not consumed as a positional key.
+XAML_KEY_RE = re.compile(
+    rb"\bL\[(?P<xaml_l_indexer>[A-Za-z0-9._-]+)\]"
+    rb"|\bLocalization\[(?P<xaml_localization_indexer>[A-Za-z0-9._-]+)\]"
+    rb"|\bLocalize\b[^\}\n]*\bKey[^\S\n]*=[^\S\n]*(?P<quote>\"|')(?P<localize_kv>[^\"'\n]+)(?P=quote)"
+    rb"|\bLocalize[^\S\n]+(?P<localize_pos>[A-Za-z0-9._-]+)"
+)
+
+# .axaml files may use both syntaxes; one combined pattern scans them in a single pass.
+AXAML_KEY_RE = re.compile(CS_KEY_RE.pattern + b"|" + XAML_KEY_RE.pattern)
 
 
 def _is_probably_key(text: str) -> bool:
     return bool(KEY_TOKEN_RE.match(text))
 
 
-def _load_en_us_keys(repo_root: Path) -> Set[str]:
+def _load_en_us_keys(repo_root: Path) -> FrozenSet[str]:
     loc_service = repo_root / "src" / "Core" / "Services" / "LocalizationService.cs"
     if not loc_service.exists():
         raise FileNotFoundError(f"Localization service not found: {loc_service}")
 
-    src = loc_service.read_text(encoding="utf-8")
     keys: Set[str] = set()
-    for m in EN_DICT_KEY_RE.finditer(src):
-        keys.add(m.group("key"))
+    with open(loc_service, "rb") as f:
+        # An empty file has no keys (and cannot be mapped); it is reported below.
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as src:
+                for m in EN_DICT_KEY_RE.finditer(src):
+                    keys.add(m.group("key").decode("utf-8"))
 
     if not keys:
         raise RuntimeError("Failed to extract en-US keys from LocalizationService.cs")
 
-    return keys
+    return frozenset(keys)
+
+
+# Per-file key references are cached under <repo>/.i18n-cache (see check-shell-i18n.py); they do
+# not depend on the en-US dictionary, so editing LocalizationService.cs keeps the cache valid.
+CACHE_DIR_NAME = ".i18n-cache"
+
+
+def _tool_stamp() -> List[int]:
+    st = os.stat(__file__)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load_cache(cache_file: Path) -> Dict[str, list]:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("tool") != _tool_stamp() or not isinstance(data.get("files"), dict):
+        return {}
+    return data["files"]
+
+
+def _save_cache(cache_file: Path, entries: Dict[str, list]) -> None:
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+        tmp_file.write_text(json.dumps({"tool": _tool_stamp(), "files": entries}), encoding="utf-8")
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # The cache only saves time; a read-only checkout still gets a full scan.
+        pass
 
 
 def _iter_shell_files(repo_root: Path) -> Iterable[Path]:
@@ -62,63 +115,123 @@ def _iter_shell_files(repo_root: Path) -> Iterable[Path]:
     if not shell_dir.exists():
         return []
 
-    for file in shell_dir.rglob("*"):
-        if file.is_dir():
-            continue
-        if any(part in ("bin", "obj") for part in file.parts):
-            continue
-        if file.suffix.lower() in (".cs", ".axaml"):
-            yield file
-
-
-def _extract_keys_from_line(file: Path, line_text: str) -> List[str]:
-    keys: List[str] = []
-
-    # C# patterns
-    for rex in (GETSTRING_RE, L_INDEXER_RE, STRINGS_INDEXER_RE, LOCALIZATION_INDEXER_RE):
-        for m in rex.finditer(line_text):
-            k = m.group("key")
-            if _is_probably_key(k):
-                keys.append(k)
-
-    # XAML patterns
-    if file.suffix.lower() == ".axaml":
-        for rex in (XAML_L_INDEXER_RE, XAML_LOCALIZATION_INDEXER_RE, XAML_LOCALIZE_POS_RE, XAML_LOCALIZE_KV_RE):
-            for m in rex.finditer(line_text):
-                k = m.group("key")
-                if _is_probably_key(k):
-                    keys.append(k)
+    return _walk_source_files(str(shell_dir))
+
+
+def _walk_source_files(path: str) -> Iterator[Path]:
+    # Prune build output at the directory level instead of stat-ing and filtering every artifact in it.
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in ("bin", "obj"):
+                    continue
+                yield from _walk_source_files(entry.path)
+            elif entry.name.lower().endswith((".cs", ".axaml")):
+                yield Path(entry.path)
+
+
+def _newline_offsets(source: mmap.mmap) -> List[int]:
+    offsets: List[int] = []
+    pos = source.find(b"\n")
+    while pos != -1:
+        offsets.append(pos)
+        pos = source.find(b"\n", pos + 1)
+    return offsets
+
+
+def _extract_keys(file: Path, source: mmap.mmap) -> List[Tuple[int, str]]:
+    """Return (offset, key) for every i18n key reference in source, in source order."""
+    rex = AXAML_KEY_RE if file.suffix.lower() == ".axaml" else CS_KEY_RE
+
+    keys: List[Tuple[int, str]] = []
+    # Each alternative ends with its key group, so lastindex selects the key of whichever one matched.
+    for m in rex.finditer(source):
+        k = m.group(m.lastindex).decode("utf-8", errors="replace")
+        if _is_probably_key(k):
+            keys.append((m.start(), k))
 
     return keys
 
 
-def main(argv: List[str]) -> int:
-    repo_root = Path(argv[1]) if len(argv) > 1 else Path.cwd()
+def _scan_file(file: Path) -> List[Tuple[Path, int, str, str]]:
+    """Return (file, line, key, context) for every key reference in file."""
+    refs: List[Tuple[Path, int, str, str]] = []
 
-    en_keys = _load_en_us_keys(repo_root)
+    with open(file, "rb") as f:
+        # mmap cannot map an empty file.
+        if os.fstat(f.fileno()).st_size == 0:
+            return refs
 
-    missing: List[MissingKey] = []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            if not KEY_HINT_RE.search(source):
+                return refs
 
-    for file in _iter_shell_files(repo_root):
-        try:
-            lines = file.read_text(encoding="utf-8").splitlines()
-        except UnicodeDecodeError:
-            lines = file.read_text(encoding="utf-8", errors="replace").splitlines()
+            newlines = _newline_offsets(source)
+            for offset, key in _extract_keys(file, source):
+                idx = bisect_left(newlines, offset)
+                start = newlines[idx - 1] + 1 if idx > 0 else 0
+                end = newlines[idx] if idx < len(newlines) else len(source)
+                # Stored unstripped; it is only trimmed if the key turns out to be missing.
+                context = source[start:end].decode("utf-8", errors="replace")
+                refs.append((file, idx + 1, key, context))
 
-        for idx, line_text in enumerate(lines, start=1):
-            for key in _extract_keys_from_line(file, line_text):
-                if key not in en_keys:
-                    missing.append(MissingKey(file=file, line=idx, key=key, context=line_text.strip()))
+    return refs
 
-    if missing:
-        print("[i18n] FAIL: Shell uses i18n keys missing from en-US resources", file=sys.stderr)
+
+def main(argv: List[str]) -> int:
+    repo_root = Path(argv[1]) if len(argv) > 1 else Path.cwd()
+
+    en_keys = _load_en_us_keys(repo_root)
+    files = list(_iter_shell_files(repo_root))
+
+    cache_file = repo_root / CACHE_DIR_NAME / "check-shell-i18n-keys.json"
+    cache = _load_cache(cache_file)
+    entries: Dict[str, list] = {}
+    per_file: Dict[Path, List[Tuple[Path, int, str, str]]] = {}
+    stale: List[Path] = []
+
+    for file in files:
+        st = file.stat()
+        key = file.relative_to(repo_root).as_posix()
+        entries[key] = [st.st_mtime_ns, st.st_size, None]
+        cached = cache.get(key)
+        if isinstance(cached, list) and cached[:2] == entries[key][:2]:
+            per_file[file] = [(file, *row) for row in cached[2]]
+            entries[key][2] = cached[2]
+        else:
+            stale.append(file)
+
+    # Scan in worker processes when more than one CPU is available.
+    if (os.cpu_count() or 1) > 1 and len(stale) > 1:
+        with ProcessPoolExecutor() as executor:
+            scanned = list(executor.map(_scan_file, stale, chunksize=8))
+    else:
+        scanned = [_scan_file(file) for file in stale]
+
+    for file, file_refs in zip(stale, scanned):
+        per_file[file] = file_refs
+        entries[file.relative_to(repo_root).as_posix()][2] = [list(ref[1:]) for ref in file_refs]
+
+    _save_cache(cache_file, entries)
+
+    refs: List[Tuple[Path, int, str, str]] = [ref for file in files for ref in per_file[file]]
+
+    # Resolve membership with one set difference instead of probing en_keys per reference.
+    # A clean run stops here without walking refs again or building MissingKey records.
+    missing_keys = {ref[2] for ref in refs} - en_keys
+
+    if missing_keys:
+        missing = [MissingKey(*ref) for ref in refs if ref[2] in missing_keys]
+
+        report = ["[i18n] FAIL: Shell uses i18n keys missing from en-US resources"]
         for item in missing:
             rel = item.file.relative_to(repo_root)
-            ctx = item.context
+            ctx = item.context.strip()
             if len(ctx) > 140:
                 ctx = ctx[:137] + "..."
-            print(f"- {rel}:{item.line} missing key '{item.key}'  ctx: {ctx}", file=sys.stderr)
-        print("[i18n] Add missing keys to Core/Services/LocalizationService.GetEnglishTranslations().", file=sys.stderr)
+            report.append(f"- {rel}:{item.line} missing key '{item.key}'  ctx: {ctx}")
+        report.append("[i18n] Add missing keys to Core/Services/LocalizationService.GetEnglishTranslations().")
+        print("\n".join(report), file=sys.stderr)
         return 1
 
     print("[i18n] OK: All Shell-referenced i18n keys exist in en-US resources")
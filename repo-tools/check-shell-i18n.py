@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import json
 import os
 import re
 import sys
-from dataclasses import dataclass
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 
-@dataclass(frozen=True)
-class Finding:
+class Finding(NamedTuple):
     file: Path
     line: int
     column: int
@@ -18,21 +20,50 @@ class Finding:
     reason: str
 
 
-KEY_LIKE_RE = re.compile(r"^[a-z0-9]+([._-][a-z0-9]+)+$", re.IGNORECASE)
 HAS_WORD_RE = re.compile(r"[A-Za-z]{3,}")
 HAS_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+WHITESPACE_RE = re.compile(r"[ \t\n]")
 TIME_FORMAT_RE = re.compile(r"^[Hhmsf:\.\-_/ ]+$")
 
+# Logging call patterns (see _is_logging_context)
+LOG_LEVEL_RE = re.compile(r"\.log(debug|information|warning|error|critical)\(", re.IGNORECASE)
+LOG_PREFIX_RE = re.compile(r"\b(log\.|serilog\.log\.)", re.IGNORECASE)
+LOG_SEVERITY_RE = re.compile(r"\.(debug|information|warning|error|fatal)\(", re.IGNORECASE)
+LOG_SERVICE_RE = re.compile(r"\.(info|warn|warning|error|debug|trace)\(", re.IGNORECASE)
 
+# Tokens required by the context checks in _scan_file: every logging pattern contains "log" or
+# "writeline", and "throw" is matched per line so "throw" / "new" split across lines still counts.
+CONTEXT_HINT_RE = re.compile(r"(?i:log|writeline)|throw|\.ToString\(|GetString\(")
+
+# C# comments and string literals. Unterminated comments/strings run to end of input.
+STRING_TOKEN_RE = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?:@\$?|\$@)\"(?P<verbatim>(?:\"\"|[^\"])*)(?:\"|\Z)"
+    r"|\$?\"(?P<regular>(?:\\.|[^\"\\])*\\?)(?:\"|\Z)",
+    re.DOTALL,
+)
+
+
+# The literal predicates below are pure; Shell code repeats the same literals heavily, so cache them.
+@lru_cache(maxsize=16384)
 def _is_key_like(text: str) -> bool:
-    # Typical i18n keys: dot/underscore/dash separated tokens, no spaces.
-    if " " in text or "\t" in text or "\n" in text:
-        return False
-    if len(text) < 3:
+    # Typical i18n keys: ASCII alphanumeric tokens separated by single '.', '_' or '-', no spaces.
+    if len(text) < 3 or not text.isascii():
         return False
-    return bool(KEY_LIKE_RE.match(text))
+    has_separator = False
+    prev_alnum = False
+    for ch in text:
+        if ch.isalnum():
+            prev_alnum = True
+        elif ch in "._-" and prev_alnum:
+            has_separator = True
+            prev_alnum = False
+        else:
+            return False
+    return has_separator and prev_alnum
 
 
+@lru_cache(maxsize=16384)
 def _looks_like_path_or_identifier(text: str) -> bool:
     if text.startswith("/") or text.startswith("\\"):
         return True
@@ -46,6 +77,12 @@ def _looks_like_path_or_identifier(text: str) -> bool:
     return False
 
 
+def _has_cjk(text: str) -> bool:
+    # CJK characters are never ASCII, and most C# literals are; str.isascii() skips the regex for those.
+    return not text.isascii() and HAS_CJK_RE.search(text) is not None
+
+
+@lru_cache(maxsize=16384)
 def _is_probable_ui_copy(text: str) -> bool:
     # Heuristic: treat anything that looks like human-facing copy (words or CJK)
     # as a violation, unless it is a key-like token.
@@ -55,14 +92,12 @@ def _is_probable_ui_copy(text: str) -> bool:
         return False
 
     # If it has any CJK, it's almost certainly UI copy.
-    if HAS_CJK_RE.search(text):
+    if _has_cjk(text):
         return True
 
     # For non-CJK: only treat phrases with whitespace as probable UI copy.
     # This avoids flagging control names like "NameTextBox".
-    has_words = bool(HAS_WORD_RE.search(text))
-    has_whitespace = any(ws in text for ws in (" ", "\t", "\n"))
-    if has_words and has_whitespace:
+    if WHITESPACE_RE.search(text) and HAS_WORD_RE.search(text):
         return True
 
     return False
@@ -82,15 +117,15 @@ def _is_logging_context(line_text: str) -> bool:
     ):
         return True
     # Common logging APIs (Microsoft.Extensions.Logging + Serilog-like)
-    if re.search(r"(?i)\.log(debug|information|warning|error|critical)\(", line_text):
+    if LOG_LEVEL_RE.search(line_text):
         return True
-    if re.search(r"(?i)\b(log\.|serilog\.log\.)", line_text):
+    if LOG_PREFIX_RE.search(line_text):
         # Often used with .Debug/.Information/etc
-        if re.search(r"(?i)\.(debug|information|warning|error|fatal)\(", line_text):
+        if LOG_SEVERITY_RE.search(line_text):
             return True
 
     # Common custom log services: _appLogService.Info("...")
-    if "logservice" in lowered and re.search(r"(?i)\.(info|warn|warning|error|debug|trace)\(", line_text):
+    if "logservice" in lowered and LOG_SERVICE_RE.search(line_text):
         return True
     return False
 
@@ -100,7 +135,25 @@ def _has_ignore_marker(prev_line: str, line_text: str) -> bool:
     return (marker in prev_line) or (marker in line_text)
 
 
-def _extract_string_literals(source: str) -> Iterable[Tuple[int, int, str]]:
+def _newline_offsets(source: str) -> List[int]:
+    offsets: List[int] = []
+    pos = source.find("\n")
+    while pos != -1:
+        offsets.append(pos)
+        pos = source.find("\n", pos + 1)
+    return offsets
+
+
+def _line_text(source: str, newlines: List[int], line: int) -> str:
+    # 1-based line; lines before the start of the file are empty.
+    if line < 1:
+        return ""
+    start = newlines[line - 2] + 1 if line > 1 else 0
+    end = newlines[line - 1] if line <= len(newlines) else len(source)
+    return source[start:end]
+
+
+def _extract_string_literals(source: str, newlines: List[int]) -> Iterable[Tuple[int, int, str]]:
     """Yield (line, col, value) for string literals.
 
     Handles:
@@ -108,166 +161,104 @@ def _extract_string_literals(source: str) -> Iterable[Tuple[int, int, str]]:
     - verbatim strings: @"..."
     - interpolated strings: $"..." and $@"..." / @$"..."
 
+    newlines holds the offset of every "\n" in source (see _newline_offsets).
+
     Note: We intentionally ignore content inside comments.
     """
 
-    i = 0
-    line = 1
-    col = 1
+    for m in STRING_TOKEN_RE.finditer(source):
+        if m.lastgroup == "comment":
+            continue
+
+        # Report the position of the opening quote, after any $/@ prefix.
+        quote = m.start(m.lastgroup) - 1
+        line_index = bisect_left(newlines, quote)
+        col = quote - (newlines[line_index - 1] if line_index > 0 else -1)
 
-    def advance(ch: str) -> None:
-        nonlocal i, line, col
-        i += 1
-        if ch == "\n":
-            line += 1
-            col = 1
+        if m.lastgroup == "verbatim":
+            # Verbatim string: "" escapes a quote
+            value = m.group("verbatim").replace('""', '"')
         else:
-            col += 1
+            # Regular string: keep escape sequences as-is for heuristics
+            value = m.group("regular")
 
-    in_block_comment = False
+        yield (line_index + 1, col, value)
 
-    while i < len(source):
-        ch = source[i]
 
-        # Handle comments
-        if in_block_comment:
-            if ch == "*" and i + 1 < len(source) and source[i + 1] == "/":
-                advance(ch)
-                advance(source[i])
-                in_block_comment = False
-                continue
-            advance(ch)
-            continue
+# Per-file results are cached under <repo>/.i18n-cache and reused while a file's mtime and size
+# are unchanged. The cache is dropped whenever this script itself changes.
+CACHE_DIR_NAME = ".i18n-cache"
 
-        if ch == "/" and i + 1 < len(source):
-            nxt = source[i + 1]
-            if nxt == "/":
-                # line comment: skip until newline
-                while i < len(source) and source[i] != "\n":
-                    advance(source[i])
-                continue
-            if nxt == "*":
-                advance(ch)
-                advance(nxt)
-                in_block_comment = True
-                continue
 
-        # Detect string start prefixes: $, @, $@, @$
-        start_i = i
-        start_line = line
-        start_col = col
-
-        is_interpolated = False
-        is_verbatim = False
-
-        if ch in ("$", "@"):  # possible prefix
-            # Look ahead for combinations before the opening quote
-            if ch == "$":
-                is_interpolated = True
-                if i + 1 < len(source) and source[i + 1] == "@":
-                    is_verbatim = True
-                    advance(ch)
-                    advance("@")
-                else:
-                    advance(ch)
-            elif ch == "@":
-                is_verbatim = True
-                if i + 1 < len(source) and source[i + 1] == "$":
-                    is_interpolated = True
-                    advance(ch)
-                    advance("$")
-                else:
-                    advance(ch)
-
-            if i >= len(source) or source[i] != '"':
-                # Not actually a string literal
-                i = start_i
-                line = start_line
-                col = start_col
-            else:
-                # Proceed, we are at opening quote
-                pass
-
-        ch = source[i]
-        if ch != '"':
-            advance(ch)
-            continue
+def _tool_stamp() -> List[int]:
+    st = os.stat(__file__)
+    return [st.st_mtime_ns, st.st_size]
 
-        # We are at opening quote
-        literal_line = line
-        literal_col = col
-        advance('"')
 
-        buf: List[str] = []
+def _load_cache(cache_file: Path) -> Dict[str, list]:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("tool") != _tool_stamp() or not isinstance(data.get("files"), dict):
+        return {}
+    return data["files"]
 
-        if is_verbatim:
-            # Verbatim string: "" escapes a quote
-            while i < len(source):
-                ch = source[i]
-                if ch == '"':
-                    if i + 1 < len(source) and source[i + 1] == '"':
-                        buf.append('"')
-                        advance('"')
-                        advance('"')
-                        continue
-                    advance('"')
-                    break
-                buf.append(ch)
-                advance(ch)
-        else:
-            # Regular string: backslash escapes
-            while i < len(source):
-                ch = source[i]
-                if ch == '"':
-                    advance('"')
-                    break
-                if ch == "\\":
-                    # keep escape sequence as-is for heuristics
-                    if i + 1 < len(source):
-                        buf.append(ch)
-                        advance(ch)
-                        buf.append(source[i])
-                        advance(source[i])
-                        continue
-                buf.append(ch)
-                advance(ch)
-
-        yield (literal_line, literal_col, "".join(buf))
 
+def _save_cache(cache_file: Path, entries: Dict[str, list]) -> None:
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+        tmp_file.write_text(json.dumps({"tool": _tool_stamp(), "files": entries}), encoding="utf-8")
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        # The cache only saves time; a read-only checkout still gets a full scan.
+        pass
 
-def main(argv: List[str]) -> int:
-    repo_root = Path(argv[1]) if len(argv) > 1 else Path.cwd()
-    shell_dir = repo_root / "src" / "Shell"
 
-    if not shell_dir.exists():
-        print(f"[i18n] Shell dir not found: {shell_dir}", file=sys.stderr)
-        return 1
+def _iter_cs_files(path: str) -> Iterator[Path]:
+    # Walk with os.scandir so bin/ and obj/ are skipped without visiting their contents.
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in ("bin", "obj"):
+                    yield from _iter_cs_files(entry.path)
+            elif entry.name.endswith(".cs"):
+                yield Path(entry.path)
+
 
+def _scan_file(file: Path) -> List[Finding]:
     findings: List[Finding] = []
 
-    for file in shell_dir.rglob("*.cs"):
-        if any(part in ("bin", "obj") for part in file.parts):
-            continue
+    try:
+        source = file.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        source = file.read_text(encoding="utf-8", errors="replace")
 
-        try:
-            source = file.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            source = file.read_text(encoding="utf-8", errors="replace")
+    newlines = _newline_offsets(source)
 
-        lines = source.splitlines()
+    for (ln, col, text) in _extract_string_literals(source, newlines):
+        # Most literals are identifiers, keys or paths; classify the text first so the
+        # context checks below only run for literals that would otherwise be reported.
+        if not _is_probable_ui_copy(text):
+            continue
 
-        for (ln, col, text) in _extract_string_literals(source):
-            if ln <= 0 or ln > len(lines):
-                continue
+        line_text = _line_text(source, newlines, ln)
+        prev_line = _line_text(source, newlines, ln - 1)
+        prev2_line = _line_text(source, newlines, ln - 2)
 
-            line_text = lines[ln - 1]
-            prev_line = lines[ln - 2] if ln - 2 >= 0 else ""
-            prev2_line = lines[ln - 3] if ln - 3 >= 0 else ""
+        if _has_ignore_marker(prev_line, line_text):
+            continue
 
-            context_text = f"{prev2_line} {prev_line} {line_text}".strip()
+        # Common debug marker strings
+        if text.startswith("[") and "]" in text and " " in text:
+            # e.g. "[Shell] ..." etc.
+            continue
 
-            if _has_ignore_marker(prev_line, line_text):
-                continue
+        # Each context check needs a CONTEXT_HINT_RE token on one of the three lines, so only
+        # join them when one is present.
+        if any(CONTEXT_HINT_RE.search(part) for part in (prev2_line, prev_line, line_text)):
+            context_text = f"{prev2_line} {prev_line} {line_text}"
 
             if _is_logging_context(context_text):
                 continue
@@ -278,21 +269,60 @@ def main(argv: List[str]) -> int:
                 continue
 
             # Allow obvious formatting strings (e.g., time formats)
-            if ".ToString(" in context_text and TIME_FORMAT_RE.match(text) and not HAS_CJK_RE.search(text):
-                continue
-
-            # Common debug marker strings
-            if text.startswith("[") and "]" in text and " " in text:
-                # e.g. "[Shell] ..." etc.
+            if ".ToString(" in context_text and TIME_FORMAT_RE.match(text) and not _has_cjk(text):
                 continue
 
             # Allow obvious localization key usage patterns.
             if "GetString(" in context_text or ".GetString(" in context_text:
                 continue
 
-            if _is_probable_ui_copy(text):
-                reason = "probable UI raw string in Shell .cs (use i18n key)"
-                findings.append(Finding(file=file, line=ln, column=col, literal=text, reason=reason))
+        reason = "probable UI raw string in Shell .cs (use i18n key)"
+        findings.append(Finding(file=file, line=ln, column=col, literal=text, reason=reason))
+
+    return findings
+
+
+def main(argv: List[str]) -> int:
+    repo_root = Path(argv[1]) if len(argv) > 1 else Path.cwd()
+    shell_dir = repo_root / "src" / "Shell"
+
+    if not shell_dir.exists():
+        print(f"[i18n] Shell dir not found: {shell_dir}", file=sys.stderr)
+        return 1
+
+    files = list(_iter_cs_files(str(shell_dir)))
+
+    cache_file = repo_root / CACHE_DIR_NAME / "check-shell-i18n.json"
+    cache = _load_cache(cache_file)
+    entries: Dict[str, list] = {}
+    per_file: Dict[Path, List[Finding]] = {}
+    stale: List[Path] = []
+
+    for file in files:
+        st = file.stat()
+        key = file.relative_to(repo_root).as_posix()
+        entries[key] = [st.st_mtime_ns, st.st_size, None]
+        cached = cache.get(key)
+        if isinstance(cached, list) and cached[:2] == entries[key][:2]:
+            per_file[file] = [Finding(file, *row) for row in cached[2]]
+            entries[key][2] = cached[2]
+        else:
+            stale.append(file)
+
+    # Files are independent, so scan them in parallel; a single CPU just pays the pool start-up cost.
+    if (os.cpu_count() or 1) > 1 and len(stale) > 1:
+        with ProcessPoolExecutor() as executor:
+            scanned = list(executor.map(_scan_file, stale, chunksize=8))
+    else:
+        scanned = [_scan_file(file) for file in stale]
+
+    for file, file_findings in zip(stale, scanned):
+        per_file[file] = file_findings
+        entries[file.relative_to(repo_root).as_posix()][2] = [list(f[1:]) for f in file_findings]
+
+    _save_cache(cache_file, entries)
+
+    findings: List[Finding] = [f for file in files for f in per_file[file]]
 
     if findings:
         print("[i18n] FAIL: Raw UI strings detected in src/Shell/**/*.cs", file=sys.stderr)